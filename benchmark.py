@@ -0,0 +1,318 @@
+"""
+Benchmark of the upload transport against a local stand-in server behind
+a latency-injecting proxy.
+
+Copyright 2017-2020 ICTU
+Copyright 2017-2022 Leiden University
+Copyright 2017-2024 Leon Helwerda
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from argparse import ArgumentParser, Namespace
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+from queue import Queue
+import socket
+import sys
+import tempfile
+from threading import Condition, Thread
+import time
+from typing import Any, BinaryIO, Deque, Optional, Tuple
+import requests
+from exchange.upload import MultipartStream, TransportAdapter, Uploader
+
+def parse_args() -> Namespace:
+    """
+    Parse command line arguments.
+    """
+
+    parser = ArgumentParser(description="Benchmark the upload transport")
+    parser.add_argument("--latency", type=float, default=25.0,
+                        help="One-way delay of the link in milliseconds")
+    parser.add_argument("--bandwidth", type=float, default=1000.0,
+                        help="Bandwidth of the link in megabits per second")
+    parser.add_argument("--window", type=int, default=4194304,
+                        help="Bytes that may be in flight on the link")
+    parser.add_argument("--size", type=int, default=67108864,
+                        help="Size in bytes of the uploaded file")
+    parser.add_argument("--count", type=int, default=3,
+                        help="Number of uploads to perform per configuration")
+    parser.add_argument("--block-sizes", dest="block_sizes", type=int,
+                        nargs="+", default=[16384, 65536, 262144],
+                        help="Block sizes to benchmark the tuned transport at")
+    parser.add_argument("--send-buffer", dest="send_buffer", type=int,
+                        default=TransportAdapter.DEFAULT_SEND_BUFFER,
+                        help="TCP send buffer size for the tuned transport")
+    parser.add_argument("--failures", type=int, default=2,
+                        help="Server errors before a key exchange succeeds")
+    return parser.parse_args()
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Request handler for the stand-in upload server.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    server: 'StandInServer'
+
+    def do_POST(self) -> None: # pylint: disable=invalid-name
+        """
+        Handle a POST request by reading the body and indicating success,
+        apart from initial failures for the key exchange.
+        """
+
+        length = int(self.headers.get('Content-Length', 0))
+        while length > 0:
+            length -= len(self.rfile.read(min(length, 1048576)))
+
+        status = 200
+        if self.path == '/exchange':
+            self.server.attempts += 1
+            if self.server.attempts <= self.server.failures:
+                status = 503
+
+        body = b'{"success": true}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # pylint: disable=redefined-builtin
+        pass
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the upload server.
+    """
+
+    def __init__(self, failures: int):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.failures = failures
+        self.attempts = 0
+
+class Link:
+    """
+    One direction of an emulated network link which delays data by the
+    one-way latency, paces it to the bandwidth and limits the number of
+    unacknowledged bytes in flight to the window.
+    """
+
+    # pylint: disable=too-few-public-methods,too-many-instance-attributes
+
+    def __init__(self, source: socket.socket, target: socket.socket,
+                 args: Namespace):
+        self._source = source
+        self._target = target
+        self._delay = args.latency / 1000.0
+        self._rate = args.bandwidth * 1000000 / 8
+        self._window = int(args.window)
+
+        self._in_flight = 0
+        self._acks: Deque[Tuple[float, int]] = deque()
+        self._condition = Condition()
+        self._queue: 'Queue[Optional[Tuple[float, bytes]]]' = Queue()
+
+    def start(self) -> None:
+        """
+        Start forwarding data over the link.
+        """
+
+        Thread(target=self._receive, daemon=True).start()
+        Thread(target=self._send, daemon=True).start()
+
+    def _wait_window(self) -> int:
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                while self._acks and self._acks[0][0] <= now:
+                    self._in_flight -= self._acks.popleft()[1]
+                if self._in_flight < self._window:
+                    return self._window - self._in_flight
+
+                timeout = self._acks[0][0] - now if self._acks else None
+                self._condition.wait(timeout)
+
+    def _receive(self) -> None:
+        while True:
+            available = self._wait_window()
+            try:
+                data = self._source.recv(min(available, 65536))
+            except OSError:
+                data = b''
+            if not data:
+                self._queue.put(None)
+                return
+
+            with self._condition:
+                self._in_flight += len(data)
+            self._queue.put((time.monotonic() + self._delay, data))
+
+    def _send(self) -> None:
+        available = time.monotonic()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                try:
+                    self._target.shutdown(socket.SHUT_WR)
+                except OSError:
+                    pass
+                return
+
+            arrival, data = item
+            available = max(available, arrival) + len(data) / self._rate
+            time.sleep(max(0.0, available - time.monotonic()))
+            try:
+                self._target.sendall(data)
+            except OSError:
+                return
+
+            with self._condition:
+                self._acks.append((available + self._delay, len(data)))
+                self._condition.notify()
+
+class LatencyProxy:
+    """
+    TCP proxy which forwards connections to the stand-in server over
+    emulated links in both directions.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, target: Tuple[str, int], args: Namespace):
+        self._target = target
+        self._args = args
+        self._listener = socket.create_server(('127.0.0.1', 0))
+        self.port = int(self._listener.getsockname()[1])
+
+    def start(self) -> None:
+        """
+        Start accepting connections.
+        """
+
+        Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self) -> None:
+        while True:
+            client, _ = self._listener.accept()
+            # Establishing a connection takes a round trip on the link.
+            time.sleep(2 * self._args.latency / 1000.0)
+            server = socket.create_connection(self._target)
+            Link(client, server, self._args).start()
+            Link(server, client, self._args).start()
+
+def create_file(size: int) -> BinaryIO:
+    """
+    Create a temporary file with random contents, standing in for an
+    encrypted file.
+    """
+
+    upload_file = tempfile.TemporaryFile()
+    remaining = size
+    while remaining > 0:
+        remaining -= upload_file.write(os.urandom(min(remaining, 1048576)))
+
+    return upload_file
+
+def upload_default(session: requests.Session, url: str,
+                   upload_file: BinaryIO) -> None:
+    """
+    Upload the file with a multipart form body built in memory.
+    """
+
+    upload_file.seek(0, os.SEEK_SET)
+    files = [("files", ("upload.gpg", upload_file, Uploader.PGP_BINARY_MIME))]
+    response = session.post(f"{url}/upload", files=files)
+    response.raise_for_status()
+
+def upload_tuned(session: requests.Session, url: str,
+                 upload_file: BinaryIO) -> None:
+    """
+    Upload the file with a streamed multipart form body.
+    """
+
+    body = MultipartStream([
+        ("files", ("upload.gpg", upload_file, Uploader.PGP_BINARY_MIME))
+    ])
+    response = session.post(f"{url}/upload", data=body,
+                            headers={'Content-Type': body.content_type})
+    response.raise_for_status()
+
+def exchange(session: requests.Session, url: str,
+             server: StandInServer) -> str:
+    """
+    Perform a key exchange request and describe its outcome.
+    """
+
+    server.attempts = 0
+    try:
+        response = session.post(f"{url}/exchange", json={'pubkey': ''})
+    except requests.exceptions.RequestException as error:
+        return f"error ({error.__class__.__name__})"
+
+    return f"{response.status_code} after {server.attempts} attempts"
+
+def run_benchmark() -> int:
+    """
+    Run the benchmark and report on throughput and key exchange outcomes.
+    """
+
+    args = parse_args()
+
+    server = StandInServer(args.failures)
+    Thread(target=server.serve_forever, daemon=True).start()
+    proxy = LatencyProxy(('127.0.0.1', server.server_port), args)
+    proxy.start()
+    url = f"http://127.0.0.1:{proxy.port}"
+
+    print(f"Link: {args.latency:g} ms one-way, {args.bandwidth:g} Mbit/s, "
+          f"{args.window} bytes window; upload of {args.size} bytes")
+    upload_file = create_file(args.size)
+
+    configurations = [('default', requests.Session(), upload_default)]
+    for block_size in args.block_sizes:
+        session = requests.Session()
+        Uploader.mount_transport(session, Namespace(
+            server=url, pool_size=TransportAdapter.DEFAULT_POOL_SIZE,
+            block_size=block_size, send_buffer=args.send_buffer,
+            keepalive=True,
+            keepalive_interval=TransportAdapter.DEFAULT_KEEPALIVE_INTERVAL,
+            retries=Uploader.DEFAULT_RETRIES,
+            backoff=Uploader.DEFAULT_BACKOFF
+        ))
+        configurations.append((f'tuned, block size {block_size}', session,
+                               upload_tuned))
+
+    for name, session, upload in configurations:
+        durations = []
+        for _ in range(args.count):
+            start = time.monotonic()
+            upload(session, url, upload_file)
+            durations.append(time.monotonic() - start)
+
+        best = min(durations)
+        print(f"{name}: best {best:.2f} s, "
+              f"mean {sum(durations) / len(durations):.2f} s, "
+              f"{args.size / best / 1048576:.1f} MiB/s; "
+              f"exchange: {exchange(session, url, server)}")
+        session.close()
+
+    upload_file.close()
+    server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(run_benchmark())
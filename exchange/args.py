@@ -20,7 +20,30 @@ limitations under the License.
 
 from argparse import ArgumentParser, Namespace
 from configparser import RawConfigParser
-from .upload import Uploader
+from typing import Callable, TypeVar
+from .upload import TransportAdapter, Uploader
+
+T = TypeVar('T')
+
+def _get_option(parser: ArgumentParser, config: RawConfigParser, option: str,
+                default: T, parse: Callable[[str], T]) -> T:
+    value = config.get('upload', option, fallback='')
+    if value == '':
+        return default
+
+    try:
+        result = parse(value)
+    except ValueError:
+        parser.error(f"Invalid value for setting '{option}': {value}")
+
+    return result
+
+def _parse_bool(value: str) -> bool:
+    states = RawConfigParser.BOOLEAN_STATES
+    if value.lower() not in states:
+        raise ValueError(f'Not a boolean: {value}')
+
+    return states[value.lower()]
 
 def parse_args(config: RawConfigParser) -> Namespace:
     """
@@ -69,6 +92,43 @@ def parse_args(config: RawConfigParser) -> Namespace:
                         default=config.get('upload', 'passphrase'),
                         help='Passphrase to use to protect client private key')
 
+    transport = TransportAdapter
+    parser.add_argument('--pool-size', dest='pool_size', type=int,
+                        default=_get_option(parser, config, 'pool_size',
+                                            transport.DEFAULT_POOL_SIZE, int),
+                        help='Number of connections to keep in the pool')
+    parser.add_argument('--block-size', dest='block_size', type=int,
+                        default=_get_option(parser, config, 'block_size',
+                                            transport.DEFAULT_BLOCK_SIZE, int),
+                        help='Block size for sending encrypted files')
+    parser.add_argument('--send-buffer', dest='send_buffer', type=int,
+                        default=_get_option(parser, config, 'send_buffer',
+                                            transport.DEFAULT_SEND_BUFFER, int),
+                        help='TCP send buffer size (0 for system default)')
+    parser.add_argument('--keepalive', action='store_true',
+                        default=_get_option(parser, config, 'keepalive',
+                                            transport.DEFAULT_KEEPALIVE,
+                                            _parse_bool),
+                        help='Enable TCP keepalive on connections')
+    parser.add_argument('--no-keepalive', dest='keepalive',
+                        action='store_false',
+                        help='Disable TCP keepalive on connections')
+    interval = transport.DEFAULT_KEEPALIVE_INTERVAL
+    parser.add_argument('--keepalive-interval', dest='keepalive_interval',
+                        type=int,
+                        default=_get_option(parser, config,
+                                            'keepalive_interval',
+                                            interval, int),
+                        help='Seconds between TCP keepalive probes')
+    parser.add_argument('--retries', type=int,
+                        default=_get_option(parser, config, 'retries',
+                                            Uploader.DEFAULT_RETRIES, int),
+                        help='Number of retries for failed requests')
+    parser.add_argument('--backoff', type=float,
+                        default=_get_option(parser, config, 'backoff',
+                                            Uploader.DEFAULT_BACKOFF, float),
+                        help='Backoff factor for delays between retries')
+
     parser.add_argument('--files', nargs='*', help='Files to upload')
 
     log_levels = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
@@ -21,8 +21,10 @@ limitations under the License.
 from argparse import Namespace
 import logging
 import os
+import socket
 import tempfile
-from typing import Any, Dict, Optional, Sequence, Union, Type, TYPE_CHECKING
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence, Tuple, \
+    Union, Type, TYPE_CHECKING
 import gpg
 from gpg_exchange import Exchange
 try:
@@ -31,7 +33,155 @@ except ImportError:
     if not TYPE_CHECKING:
         keyring = None
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth, HTTPDigestAuth
+from urllib3.connection import HTTPConnection
+from urllib3.fields import RequestField
+from urllib3.filepost import choose_boundary
+from urllib3.util.retry import Retry
+
+class MultipartStream:
+    """
+    File-like multipart form data request body which reads the contents of
+    the files only while the body is sent, in blocks of the size that the
+    connection requests.
+    """
+
+    def __init__(self, files: Sequence[Tuple[str, Tuple[str, BinaryIO, str]]]):
+        boundary = choose_boundary()
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+
+        self._parts: List[Union[bytes, BinaryIO]] = []
+        self._sizes: List[int] = []
+        for name, (filename, file, mime) in files:
+            field = RequestField(name, b'', filename=filename)
+            field.make_multipart(content_type=mime)
+            header = f"--{boundary}\r\n{field.render_headers()}"
+            self._add_part(header.encode('utf-8'))
+            self._parts.append(file)
+            self._sizes.append(file.seek(0, os.SEEK_END))
+            self._add_part(b"\r\n")
+
+        self._add_part(f"--{boundary}--\r\n".encode('utf-8'))
+        self._length = sum(self._sizes)
+        self._position = 0
+
+    def _add_part(self, part: bytes) -> None:
+        self._parts.append(part)
+        self._sizes.append(len(part))
+
+    def __len__(self) -> int:
+        return self._length
+
+    def tell(self) -> int:
+        """
+        Retrieve the current position in the body.
+        """
+
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        """
+        Change the position in the body, for example to send it again.
+        """
+
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self._length
+
+        self._position = max(0, min(offset, self._length))
+        return self._position
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Read at most `size` bytes from the body, or the remainder of the body
+        if `size` is negative.
+        """
+
+        if size < 0:
+            size = self._length - self._position
+
+        blocks = []
+        start = 0
+        for part, part_size in zip(self._parts, self._sizes):
+            offset = self._position - start
+            start += part_size
+            if size <= 0 or offset >= part_size:
+                continue
+
+            length = min(size, part_size - offset)
+            if isinstance(part, bytes):
+                block = part[offset:offset + length]
+            else:
+                part.seek(offset, os.SEEK_SET)
+                block = part.read(length)
+                if len(block) != length:
+                    raise ValueError('File changed size during upload')
+
+            blocks.append(block)
+            self._position += length
+            size -= length
+
+        return b''.join(blocks)
+
+class TransportAdapter(HTTPAdapter):
+    """
+    HTTP adapter with tuned connection pool, send block size and socket options
+    for transfers over high-bandwidth, high-latency links.
+    """
+
+    DEFAULT_POOL_SIZE = 10
+    DEFAULT_BLOCK_SIZE = 65536
+    DEFAULT_SEND_BUFFER = 0
+    DEFAULT_KEEPALIVE = True
+    DEFAULT_KEEPALIVE_INTERVAL = 30
+
+    # Number of unanswered keepalive probes before a connection is dropped.
+    KEEPALIVE_PROBES = 4
+
+    def __init__(self, *, pool_size: int = DEFAULT_POOL_SIZE,
+                 block_size: int = DEFAULT_BLOCK_SIZE,
+                 send_buffer: int = DEFAULT_SEND_BUFFER,
+                 keepalive: bool = DEFAULT_KEEPALIVE,
+                 keepalive_interval: int = DEFAULT_KEEPALIVE_INTERVAL,
+                 max_retries: Union[Retry, int] = 0):
+        # pylint: disable=too-many-arguments
+        self._block_size = block_size
+        self._socket_options: List[Tuple[int, int, int]] = \
+            list(HTTPConnection.default_socket_options)
+        if send_buffer > 0:
+            self._socket_options.append(
+                (socket.SOL_SOCKET, socket.SO_SNDBUF, send_buffer)
+            )
+        if keepalive:
+            self._socket_options.append(
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            )
+            # Replace the system probe timers, which often only start after
+            # hours, where the platform allows to set them per socket.
+            for name, value in (('TCP_KEEPIDLE', keepalive_interval),
+                                ('TCP_KEEPINTVL', keepalive_interval),
+                                ('TCP_KEEPCNT', self.KEEPALIVE_PROBES)):
+                if hasattr(socket, name):
+                    self._socket_options.append(
+                        (socket.IPPROTO_TCP, getattr(socket, name), value)
+                    )
+
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size,
+                         max_retries=max_retries)
+
+    def init_poolmanager(self, connections: int, maxsize: int,
+                         block: bool = False, **pool_kwargs: Any) -> None:
+        pool_kwargs.setdefault('blocksize', self._block_size)
+        pool_kwargs.setdefault('socket_options', self._socket_options)
+        super().init_poolmanager(connections, maxsize, block=block,
+                                 **pool_kwargs)
+
+    def proxy_manager_for(self, proxy: str, **proxy_kwargs: Any) -> Any:
+        proxy_kwargs.setdefault('blocksize', self._block_size)
+        proxy_kwargs.setdefault('socket_options', self._socket_options)
+        return super().proxy_manager_for(proxy, **proxy_kwargs)
 
 class Uploader:
     """
@@ -46,6 +196,12 @@ class Uploader:
         'digest': HTTPDigestAuth
     }
 
+    DEFAULT_RETRIES = 3
+    DEFAULT_BACKOFF = 0.5
+
+    # Server error responses for which the key exchange request is retried.
+    RETRY_STATUSES = (502, 503, 504)
+
     def __init__(self, args: Namespace):
         self.args = args
         self._gpg = Exchange(home_dir=self.args.home_dir,
@@ -54,6 +210,7 @@ class Uploader:
 
         self._session = requests.Session()
         self._session.verify = self.args.verify
+        self.mount_transport(self._session, self.args)
 
         self._name = str(self.args.name)
         self._keyring = str(self.args.keyring)
@@ -69,6 +226,43 @@ class Uploader:
             auth = self.AUTH_CLASSES[auth_class]
             self._session.auth = auth(username, password)
 
+    @classmethod
+    def mount_transport(cls, session: requests.Session,
+                        args: Namespace) -> None:
+        """
+        Mount transport adapters for the upload server in `args` to the
+        `session`, using the connection and retry settings from `args`.
+        """
+
+        retries = int(args.retries)
+        backoff = float(args.backoff)
+
+        # Only retry failed connections by default, since uploads are not
+        # idempotent once the request has been (partially) sent.
+        connect_retry = Retry(total=retries, connect=retries, read=False,
+                              status=0, other=0, backoff_factor=backoff)
+
+        # The key exchange returns the same server key for the same public
+        # key, so it is safe to retry it on read errors and server errors.
+        exchange_retry = Retry(total=retries, backoff_factor=backoff,
+                               allowed_methods=frozenset(['POST']),
+                               status_forcelist=cls.RETRY_STATUSES,
+                               raise_on_status=False)
+
+        options: Dict[str, Any] = {
+            'pool_size': int(args.pool_size),
+            'block_size': int(args.block_size),
+            'send_buffer': int(args.send_buffer),
+            'keepalive': bool(args.keepalive),
+            'keepalive_interval': int(args.keepalive_interval)
+        }
+        session.mount(f"{args.server}/",
+                      TransportAdapter(max_retries=connect_retry,
+                                       **options))
+        session.mount(f"{args.server}/exchange",
+                      TransportAdapter(max_retries=exchange_retry,
+                                       **options))
+
     def _get_passphrase(self, hint: str, desc: str, prev_bad: int,
                         hook: Optional[Any] = None) -> str:
         # pylint: disable=unused-argument
@@ -158,12 +352,16 @@ class Uploader:
                 self._gpg.encrypt_file(plaintext, upload_file, server_key,
                                        always_trust=True, armor=False)
 
-                upload_file.seek(0, os.SEEK_SET)
                 files.append((file_field,
                               (filename, upload_file, self.PGP_BINARY_MIME)))
                 temp_files.append(upload_file)
 
-        response = self._session.post(f"{self.args.server}/upload", files=files)
+        # Stream the encrypted files so that they are sent in blocks.
+        body = MultipartStream(files)
+        response = self._session.post(f"{self.args.server}/upload", data=body,
+                                      headers={
+                                          'Content-Type': body.content_type
+                                      })
         for temp_file in temp_files:
             temp_file.close()
         try:
@@ -19,9 +19,11 @@ limitations under the License.
 """
 
 from configparser import RawConfigParser
+from io import StringIO
 import unittest
 from unittest.mock import patch
 from exchange.args import parse_args
+from exchange.upload import TransportAdapter, Uploader
 
 class ParseArgsTest(unittest.TestCase):
     """
@@ -35,7 +37,62 @@ class ParseArgsTest(unittest.TestCase):
 
         config = RawConfigParser()
         config.read("settings.cfg.example")
+        # Transport settings that are left empty use default values.
+        for option in ('pool_size', 'block_size', 'send_buffer', 'keepalive',
+                       'keepalive_interval', 'retries', 'backoff'):
+            config.set('upload', option, '')
+
         with patch('sys.argv',
                    new=['upload.py', '--files', 'test/sample/upload.txt']):
             args = parse_args(config)
             self.assertEqual(args.files, ['test/sample/upload.txt'])
+            self.assertEqual(args.pool_size,
+                             TransportAdapter.DEFAULT_POOL_SIZE)
+            self.assertEqual(args.block_size,
+                             TransportAdapter.DEFAULT_BLOCK_SIZE)
+            self.assertEqual(args.keepalive,
+                             TransportAdapter.DEFAULT_KEEPALIVE)
+            self.assertEqual(args.keepalive_interval,
+                             TransportAdapter.DEFAULT_KEEPALIVE_INTERVAL)
+            self.assertEqual(args.retries, Uploader.DEFAULT_RETRIES)
+
+        config.set('upload', 'block_size', '262144')
+        config.set('upload', 'keepalive', 'No')
+        config.set('upload', 'backoff', '2')
+        with patch('sys.argv',
+                   new=['upload.py', '--retries', '0', '--send-buffer', '4096',
+                        '--keepalive-interval', '10',
+                        '--files', 'test/sample/upload.txt']):
+            args = parse_args(config)
+            self.assertEqual(args.block_size, 262144)
+            self.assertFalse(args.keepalive)
+            self.assertEqual(args.backoff, 2.0)
+            self.assertEqual(args.retries, 0)
+            self.assertEqual(args.send_buffer, 4096)
+            self.assertEqual(args.keepalive_interval, 10)
+
+        config.set('upload', 'keepalive', '1')
+        config.set('upload', 'pool_size', '1O')
+        with patch('sys.argv', new=['upload.py']):
+            with patch('sys.stderr', new=StringIO()) as stderr:
+                with self.assertRaises(SystemExit):
+                    parse_args(config)
+
+                self.assertIn("Invalid value for setting 'pool_size': 1O",
+                              stderr.getvalue())
+
+        config.set('upload', 'pool_size', '4')
+        config.set('upload', 'keepalive', 'maybe')
+        with patch('sys.argv', new=['upload.py']):
+            with patch('sys.stderr', new=StringIO()) as stderr:
+                with self.assertRaises(SystemExit):
+                    parse_args(config)
+
+                self.assertIn("Invalid value for setting 'keepalive': maybe",
+                              stderr.getvalue())
+
+        config.set('upload', 'keepalive', 'on')
+        with patch('sys.argv', new=['upload.py']):
+            args = parse_args(config)
+            self.assertTrue(args.keepalive)
+            self.assertEqual(args.pool_size, 4)
@@ -20,11 +20,141 @@ limitations under the License.
 
 from argparse import Namespace
 from email import message_from_bytes
-from typing import Any, Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import socket
+from threading import Thread
+from typing import Any, Dict, Optional, cast
 import unittest
 from gpg_exchange import Exchange
+import requests
 import requests_mock
-from exchange.upload import Uploader
+from urllib3.connection import HTTPConnection
+from exchange.upload import TransportAdapter, Uploader
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the upload server which responds with errors to
+    a number of initial requests for each path.
+    """
+
+    def __init__(self, failures: int):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.failures = failures
+        self.attempts: Dict[str, int] = {}
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Request handler for the local stand-in upload server.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    server: StandInServer
+
+    def do_POST(self) -> None: # pylint: disable=invalid-name
+        """
+        Handle a POST request to the stand-in server.
+        """
+
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        attempts = self.server.attempts.get(self.path, 0) + 1
+        self.server.attempts[self.path] = attempts
+
+        status = 503 if attempts <= self.server.failures else 200
+        body = b'{"success": true}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # pylint: disable=redefined-builtin
+        pass
+
+class TransportTest(unittest.TestCase):
+    """
+    Tests for the transport adapters of the uploader against a local server.
+    """
+
+    def setUp(self) -> None:
+        self.server = StandInServer(failures=2)
+        thread = Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        self.args = Namespace(server=self.url, pool_size=4, block_size=131072,
+                              send_buffer=1048576, keepalive=True,
+                              keepalive_interval=10, retries=2, backoff=0)
+        self.session = requests.Session()
+        self.addCleanup(self.session.close)
+        Uploader.mount_transport(self.session, self.args)
+
+    def test_mount_transport(self) -> None:
+        """
+        Test the configuration of the mounted transport adapters.
+        """
+
+        upload = self.session.get_adapter(f'{self.url}/upload')
+        exchange = self.session.get_adapter(f'{self.url}/exchange')
+        self.assertIsInstance(upload, TransportAdapter)
+        self.assertIsInstance(exchange, TransportAdapter)
+        upload = cast(TransportAdapter, upload)
+        exchange = cast(TransportAdapter, exchange)
+
+        pool_kwargs = upload.poolmanager.connection_pool_kw
+        self.assertEqual(pool_kwargs['blocksize'], 131072)
+        self.assertIn((socket.SOL_SOCKET, socket.SO_SNDBUF, 1048576),
+                      pool_kwargs['socket_options'])
+        self.assertIn((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+                      pool_kwargs['socket_options'])
+        self.assertEqual(pool_kwargs['maxsize'], 4)
+        if hasattr(socket, 'TCP_KEEPIDLE'):
+            self.assertIn((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 10),
+                          pool_kwargs['socket_options'])
+
+        self.assertEqual(upload.max_retries.connect, 2)
+        self.assertFalse(upload.max_retries.is_retry('POST', 503))
+        self.assertEqual(exchange.max_retries.total, 2)
+        self.assertTrue(exchange.max_retries.is_retry('POST', 503))
+
+        proxy_kwargs = upload.proxy_manager_for('http://proxy.test:3128') \
+            .connection_pool_kw
+        self.assertEqual(proxy_kwargs['blocksize'], 131072)
+        self.assertEqual(proxy_kwargs['socket_options'],
+                         pool_kwargs['socket_options'])
+
+        adapter = TransportAdapter(send_buffer=0, keepalive=False)
+        pool_kwargs = adapter.poolmanager.connection_pool_kw
+        self.assertEqual(pool_kwargs['blocksize'],
+                         TransportAdapter.DEFAULT_BLOCK_SIZE)
+        self.assertEqual(pool_kwargs['socket_options'],
+                         HTTPConnection.default_socket_options)
+
+    def test_exchange_retry(self) -> None:
+        """
+        Test retrying the key exchange on server errors.
+        """
+
+        response = self.session.post(f'{self.url}/exchange', json={})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.attempts['/exchange'], 3)
+
+        self.server.failures = 5
+        self.server.attempts.clear()
+        response = self.session.post(f'{self.url}/exchange', json={})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.server.attempts['/exchange'], 3)
+
+    def test_upload_retry(self) -> None:
+        """
+        Test not retrying uploads on server errors.
+        """
+
+        response = self.session.post(f'{self.url}/upload', data=b'data')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.server.attempts['/upload'], 1)
 
 class UploaderTest(unittest.TestCase):
     """
@@ -58,6 +188,13 @@ class UploaderTest(unittest.TestCase):
         args.email = 'example@org.test'
         args.passphrase = 'pass'
         args.files = ['test/sample/upload.txt']
+        args.pool_size = 4
+        args.block_size = 131072
+        args.send_buffer = 1048576
+        args.keepalive = True
+        args.keepalive_interval = 10
+        args.retries = 2
+        args.backoff = 0.1
         self.uploader = Uploader(args)
 
         with open('test/sample/server.gpg', encoding='utf-8') as pubkey_file:
@@ -155,6 +292,15 @@ class UploaderTest(unittest.TestCase):
 
         filename = 'test/sample/upload.txt'
         server_key = self.gpg.import_key(self.server_pubkey)[0]
+
+        # The streamed body can only be read while the upload is in progress.
+        bodies = []
+        def read_body(request: Any, context: Any) -> Dict[str, bool]:
+            # pylint: disable=unused-argument
+            bodies.append(request.body.read())
+            return {'success': True}
+
+        self.request.post('https://upload.test/upload', json=read_body)
         self.uploader.upload(server_key, [filename])
         self.assertTrue(self.request.called)
         if self.request.last_request is None:
@@ -163,7 +309,7 @@ class UploaderTest(unittest.TestCase):
         # Parse the request body to check proper multipart form data.
         body: bytes = b'Content-Type: ' + \
             self.request.last_request.headers['Content-Type'].encode('utf-8') + \
-            b'\r\n\r\n' + self.request.last_request.body
+            b'\r\n\r\n' + bodies[0]
         message = message_from_bytes(body)
         self.assertTrue(message.is_multipart())
         parts = 0